@@ -5,6 +5,8 @@ import logging
 import ssl
 import os
 import time
+import queue
+import asyncio
 from urllib.parse import quote
 
 # Configure logging
@@ -15,6 +17,9 @@ logger = logging.getLogger(__name__)
 TARGET_HOST = '172.16.16.101'
 TARGET_PORT = 8890
 
+# Socket buffer size requested for file uploads and downloads
+BULK_BUFFER_SIZE = 1 << 20
+
 class FileTransferClient:
     """HTTP client for file transfer operations"""
     
@@ -22,6 +27,7 @@ class FileTransferClient:
         self.server_host = host
         self.server_port = port
         self.connection_timeout = 15
+        self._pool = queue.Queue()
         
     def establish_connection(self, target_host='172.16.16.101', target_port=13000):
         """Create socket connection to server"""
@@ -35,63 +41,236 @@ class FileTransferClient:
             logger.error(f"Connection error: {str(conn_error)}")
             return None
 
-    def transmit_command(self, command_data):
-        """Send command to server and receive response"""
+    def _acquire(self, timeout=12.0):
+        """Take an idle keep-alive connection from the pool or open a new one"""
         try:
-            client_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            client_sock.settimeout(12.0)
+            client_sock = self._pool.get_nowait()
+            reused = True
+        except queue.Empty:
             server_endpoint = (self.server_host, self.server_port)
-            client_sock.connect(server_endpoint)
-            
-            # Format command properly
-            if not command_data.endswith('\r\n\r\n'):
-                command_data = command_data.replace('\n', '\r\n') + '\r\n'
+            client_sock = socket.create_connection(server_endpoint, timeout=timeout)
+            # Small commands should not wait on Nagle's algorithm
+            client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            reused = False
+        client_sock.settimeout(timeout)
+        return client_sock, reused
+
+    def _enlarge_buffers(self, client_sock):
+        """Request larger kernel socket buffers for a bulk transfer"""
+        for buffer_option in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+            try:
+                client_sock.setsockopt(socket.SOL_SOCKET, buffer_option, BULK_BUFFER_SIZE)
+            except OSError:
+                # The kernel may refuse or clamp the size; the default still works
+                pass
+
+    def _release(self, client_sock):
+        """Return a connection to the pool so the next request can reuse it"""
+        self._pool.put(client_sock)
+
+    def _discard(self, client_sock):
+        """Close a connection that must not be reused"""
+        try:
+            client_sock.close()
+        except OSError:
+            pass
+
+    def close(self):
+        """Close every pooled connection"""
+        while True:
+            try:
+                self._discard(self._pool.get_nowait())
+            except queue.Empty:
+                break
+
+    def _frame_command(self, command_data):
+        """Normalise a header-only request and advertise keep-alive"""
+        header_lines = [line.rstrip('\r') for line in command_data.strip().splitlines()]
+        if not any(line.lower().startswith('connection:') for line in header_lines):
+            header_lines.append('Connection: keep-alive')
+        return ('\r\n'.join(header_lines) + '\r\n\r\n').encode()
+
+    def _parse_response_headers(self, header_section):
+        """Parse response header lines into a lowercase-keyed dictionary"""
+        response_headers = {}
+        for header in header_section.decode('utf-8', errors='replace').split('\r\n')[1:]:
+            if ':' in header:
+                key, value = header.split(':', 1)
+                response_headers[key.strip().lower()] = value.strip()
+        return response_headers
+
+    def _decode_chunks(self, receive_buffer, chunk_pos, received, body_chunks):
+        """Decode the complete chunks of a chunked body that are already buffered
+
+        Appends chunk data to body_chunks and returns the position of the
+        first undecoded byte and whether the terminating chunk was reached.
+        """
+        while True:
+            line_end = receive_buffer.find(b"\r\n", chunk_pos, received)
+            if line_end < 0:
+                return chunk_pos, False
             
-            client_sock.sendall(command_data.encode())
+            # Chunk size is hex, optionally followed by ;extensions
+            chunk_size = int(bytes(receive_buffer[chunk_pos:line_end]).split(b";", 1)[0], 16)
+            data_start = line_end + 2
             
-            # Receive response
-            response_data = b""
-            while True:
-                data_chunk = client_sock.recv(8192)
-                if not data_chunk:
-                    break
-                response_data += data_chunk
-                if len(data_chunk) < 8192:
-                    break
+            if chunk_size == 0:
+                # Last chunk: the body ends after the (usually empty) trailer section
+                if receive_buffer[data_start:data_start + 2] == b"\r\n":
+                    return data_start + 2, True
+                if receive_buffer.find(b"\r\n\r\n", data_start, received) >= 0:
+                    return received, True
+                return chunk_pos, False
             
-            return response_data.decode('utf-8', errors='replace')
+            data_end = data_start + chunk_size
+            if data_end + 2 > received:
+                return chunk_pos, False
+            with memoryview(receive_buffer) as buffer_view:
+                body_chunks.append(buffer_view[data_start:data_end].tobytes())
+            chunk_pos = data_end + 2
+
+    def _receive_response(self, client_sock):
+        """Read exactly one HTTP response
+
+        The body is framed by Content-Length or decoded from chunked
+        transfer-encoding; only a response with neither is read until the
+        server closes. Returns the raw response bytes (with any chunked body
+        already decoded) and whether the connection can be reused.
+        """
+        receive_buffer = bytearray(65536)
+        received = 0
+        reading_headers = True
+        # Bytes before this offset were already searched for the header end
+        scan_from = 0
+        body_start = 0
+        content_length = None
+        chunked = False
+        chunk_pos = 0
+        body_chunks = []
+        keep_alive = False
+
+        while True:
+            if reading_headers:
+                header_boundary = receive_buffer.find(b"\r\n\r\n", max(0, scan_from - 3), received)
+                scan_from = received
+                if header_boundary >= 0:
+                    response_headers = self._parse_response_headers(receive_buffer[:header_boundary])
+                    body_start = header_boundary + 4
+                    keep_alive = response_headers.get('connection', '').lower() != 'close'
+                    if 'chunked' in response_headers.get('transfer-encoding', '').lower():
+                        chunked = True
+                        chunk_pos = body_start
+                    elif 'content-length' in response_headers:
+                        content_length = int(response_headers['content-length'])
+                    else:
+                        keep_alive = False
+                    reading_headers = False
+
+            if not reading_headers:
+                if chunked:
+                    chunk_pos, finished = self._decode_chunks(receive_buffer, chunk_pos, received, body_chunks)
+                    if finished:
+                        return self._copy_out(receive_buffer, body_start) + b"".join(body_chunks), keep_alive
+                elif content_length is not None:
+                    if received - body_start >= content_length:
+                        return self._copy_out(receive_buffer, body_start + content_length), keep_alive
+
+            if received == len(receive_buffer):
+                # Buffer full: double it so total copying stays linear
+                receive_buffer.extend(bytes(len(receive_buffer)))
+            with memoryview(receive_buffer) as buffer_view:
+                bytes_read = client_sock.recv_into(buffer_view[received:])
+            if not bytes_read:
+                if reading_headers:
+                    raise ConnectionError("Connection closed before response headers arrived")
+                if chunked or content_length is not None:
+                    raise ConnectionError("Connection closed before the response body was complete")
+                # No framing: the body is delimited by the server closing
+                return self._copy_out(receive_buffer, received), False
+            received += bytes_read
+
+    def _copy_out(self, receive_buffer, length):
+        """Copy the filled part of the receive buffer into bytes exactly once"""
+        with memoryview(receive_buffer) as buffer_view:
+            return buffer_view[:length].tobytes()
+
+    def _split_response(self, response_data):
+        """Split a raw response into decoded headers and undecoded body bytes
+
+        Only the status line and headers are decoded (as ASCII); the body
+        stays bytes so binary downloads are never run through a text codec.
+        """
+        header_boundary = response_data.find(b"\r\n\r\n")
+        if header_boundary < 0:
+            return response_data.decode('ascii', errors='replace'), b""
+        return (response_data[:header_boundary].decode('ascii', errors='replace'),
+                response_data[header_boundary + 4:])
+
+    def show_response(self, response_headers, response_body):
+        """Print a response, decoding the body only when it is text"""
+        print(response_headers)
+        print()
+        content_type = 'text/plain'
+        for header in response_headers.split('\r\n')[1:]:
+            if header.lower().startswith('content-type:'):
+                content_type = header.split(':', 1)[1].strip()
+        if content_type.startswith('text/') or not response_body:
+            print(response_body.decode('utf-8', errors='replace'))
+        else:
+            print(f"[{len(response_body)} bytes of {content_type} data]")
+
+    def _exchange(self, request_bytes, timeout=12.0, body_file=None, bulk=False):
+        """Send a request over a pooled connection and return the raw response
+
+        When body_file is given, request_bytes holds only the headers and the
+        body is streamed from the file with sendfile(). bulk enlarges the
+        socket buffers for requests that move a whole file.
+        """
+        while True:
+            client_sock, reused = self._acquire(timeout)
+            try:
+                if bulk:
+                    self._enlarge_buffers(client_sock)
+                client_sock.sendall(request_bytes)
+                if body_file is not None:
+                    body_file.seek(0)
+                    client_sock.sendfile(body_file)
+                response_data, keep_alive = self._receive_response(client_sock)
+            except socket.timeout:
+                self._discard(client_sock)
+                raise
+            except (ConnectionError, socket.error):
+                self._discard(client_sock)
+                if reused:
+                    # The server dropped the idle connection; retry on a fresh one
+                    continue
+                raise
+
+            if keep_alive:
+                self._release(client_sock)
+            else:
+                self._discard(client_sock)
+            return response_data
+
+    def transmit_command(self, command_data, bulk=False):
+        """Send command to server and return (headers, body_bytes)"""
+        try:
+            response_data = self._exchange(self._frame_command(command_data), bulk=bulk)
+            return self._split_response(response_data)
             
         except socket.timeout:
-            return "ERROR: Connection timed out"
+            return "ERROR: Connection timed out", b""
         except Exception as transmit_error:
-            return f"ERROR: {str(transmit_error)}"
-        finally:
-            client_sock.close()
+            return f"ERROR: {str(transmit_error)}", b""
 
     def transmit_binary_data(self, binary_payload):
-        """Send binary data to server"""
+        """Send binary data to server and return (headers, body_bytes)"""
         try:
-            client_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            client_sock.settimeout(12.0)
-            server_endpoint = (self.server_host, self.server_port)
-            client_sock.connect(server_endpoint)
-            client_sock.sendall(binary_payload)
-            
-            response_data = b""
-            while True:
-                data_chunk = client_sock.recv(8192)
-                if not data_chunk:
-                    break
-                response_data += data_chunk
-                if len(data_chunk) < 8192:
-                    break
-                    
-            return response_data.decode('utf-8', errors='replace')
+            response_data = self._exchange(binary_payload)
+            return self._split_response(response_data)
             
         except Exception as binary_error:
-            return f"ERROR: {str(binary_error)}"
-        finally:
-            client_sock.close()
+            return f"ERROR: {str(binary_error)}", b""
 
     def get_file_directory(self):
         """Retrieve directory listing from server"""
@@ -102,58 +281,190 @@ Accept: text/plain\r
 
 """
         print("Fetching file directory from server...")
-        server_response = self.transmit_command(command)
+        response_headers, response_body = self.transmit_command(command)
         print("Server Response:")
-        print(server_response)
+        self.show_response(response_headers, response_body)
 
     def send_file_to_server(self, file_path):
         """Upload file to server using binary transfer"""
         try:
-            with open(file_path, 'rb') as file_handle:
-                file_bytes = file_handle.read()
-        
             filename = os.path.basename(file_path)
             
-            # Build HTTP request with file data
-            http_request = (
-                f"POST /file-upload HTTP/1.1\r\n"
-                f"Host: {self.server_host}\r\n"
-                f"User-Agent: FileUploader/1.5\r\n"
-                f"X-Upload-Filename: {filename}\r\n"
-                f"Content-Type: application/octet-stream\r\n"
-                f"Content-Length: {len(file_bytes)}\r\n"
-                f"\r\n"
-            ).encode() + file_bytes
-
-            # Send request to server
-            client_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            client_sock.settimeout(35.0)
-            server_endpoint = (self.server_host, self.server_port)
-            client_sock.connect(server_endpoint)
-            
-            try:
-                client_sock.sendall(http_request)
-                server_response = client_sock.recv(8192)
-                print(server_response.decode('utf-8', errors='replace'))
-            finally:
-                client_sock.close()
+            with open(file_path, 'rb') as file_handle:
+                file_size = os.fstat(file_handle.fileno()).st_size
+                
+                # Build HTTP request headers; the body is streamed from the file
+                http_request = (
+                    f"POST /file-upload HTTP/1.1\r\n"
+                    f"Host: {self.server_host}\r\n"
+                    f"User-Agent: FileUploader/1.5\r\n"
+                    f"X-Upload-Filename: {filename}\r\n"
+                    f"Content-Type: application/octet-stream\r\n"
+                    f"Content-Length: {file_size}\r\n"
+                    f"Connection: keep-alive\r\n"
+                    f"\r\n"
+                ).encode()
+
+                # Send request to server over a pooled connection
+                server_response = self._exchange(http_request, timeout=35.0, body_file=file_handle, bulk=True)
+            self.show_response(*self._split_response(server_response))
                 
         except FileNotFoundError:
             print(f"ERROR: File {file_path} not found")
         except Exception as upload_error:
             print(f"Upload error: {str(upload_error)}")
 
+    def build_delete_command(self, target_filename):
+        """Build the DELETE request for a single file"""
+        return f"""DELETE /{quote(target_filename)} HTTP/1.1\r
+Host: {self.server_host}\r
+User-Agent: FileClient/1.5\r
+Accept: */*\r
+
+"""
+
     def remove_file_from_server(self, target_filename):
         """Delete file from server"""
-        command = f"""DELETE /{quote(target_filename)} HTTP/1.1\r
+        command = self.build_delete_command(target_filename)
+        print(f"Deleting file: {target_filename}")
+        response_headers, response_body = self.transmit_command(command)
+        self.show_response(response_headers, response_body)
+
+    def download_file_from_server(self, target_filename, save_path=None):
+        """Download a file from the server and save its body to disk"""
+        command = f"""GET /{quote(target_filename)} HTTP/1.1\r
 Host: {self.server_host}\r
 User-Agent: FileClient/1.5\r
 Accept: */*\r
 
 """
-        print(f"Deleting file: {target_filename}")
-        server_response = self.transmit_command(command)
-        print(server_response)
+        print(f"Downloading file: {target_filename}")
+        response_headers, response_body = self.transmit_command(command, bulk=True)
+        status_line = response_headers.split('\r\n', 1)[0]
+        if ' 200 ' not in status_line:
+            self.show_response(response_headers, response_body)
+            return
+        
+        save_path = save_path or os.path.basename(target_filename)
+        with open(save_path, 'wb') as output_file:
+            output_file.write(response_body)
+        print(f"Saved {len(response_body)} bytes to {save_path}")
+
+    async def _read_response_async(self, stream_reader):
+        """Read one Content-Length or chunked response from an asyncio stream"""
+        header_block = await stream_reader.readuntil(b"\r\n\r\n")
+        response_headers = self._parse_response_headers(header_block[:-4])
+        
+        keep_alive = response_headers.get('connection', '').lower() != 'close'
+        if 'chunked' in response_headers.get('transfer-encoding', '').lower():
+            body_chunks = []
+            while True:
+                size_line = await stream_reader.readuntil(b"\r\n")
+                chunk_size = int(size_line.split(b";", 1)[0], 16)
+                if chunk_size == 0:
+                    # Skip the trailer section up to the blank line
+                    while await stream_reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                body_chunks.append(await stream_reader.readexactly(chunk_size))
+                await stream_reader.readexactly(2)
+            body = b"".join(body_chunks)
+        elif 'content-length' in response_headers:
+            body = await stream_reader.readexactly(int(response_headers['content-length']))
+        else:
+            body = await stream_reader.read()
+            keep_alive = False
+        return header_block + body, keep_alive
+
+    async def _open_stream(self, timeout=12.0):
+        """Open an asyncio connection to the server"""
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.server_host, self.server_port), timeout)
+
+    async def _close_stream(self, stream_writer):
+        """Close an asyncio connection, ignoring errors from a peer that already left"""
+        stream_writer.close()
+        try:
+            await stream_writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _pipeline_requests(self, stream_reader, stream_writer, request_list, timeout=12.0):
+        """Write requests back-to-back on one connection and read the responses in order
+
+        Returns the responses that were answered and whether the connection
+        is still usable. Reading stops early once the server announces or
+        performs a close.
+        """
+        stream_writer.write(b"".join(request_list))
+        await stream_writer.drain()
+        
+        responses = []
+        keep_alive = True
+        for _ in request_list:
+            try:
+                response_data, keep_alive = await asyncio.wait_for(
+                    self._read_response_async(stream_reader), timeout)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                keep_alive = False
+                break
+            responses.append(response_data)
+            if not keep_alive:
+                break
+        return responses, keep_alive
+
+    async def _send_on_new_connection(self, request_list):
+        """Pipeline requests on a dedicated connection"""
+        stream_reader, stream_writer = await self._open_stream()
+        try:
+            return await self._pipeline_requests(stream_reader, stream_writer, request_list)
+        finally:
+            await self._close_stream(stream_writer)
+
+    async def batch_delete(self, target_filenames):
+        """Delete several files with as few round trips as the server allows
+
+        The first request probes whether the server keeps the connection
+        open. If it does, the remaining requests are pipelined behind it
+        (HTTP/1.1 answers them in order); otherwise whatever is left is sent
+        concurrently on separate connections.
+        """
+        request_list = [self._frame_command(self.build_delete_command(name)) for name in target_filenames]
+        if not request_list:
+            return []
+        
+        stream_reader, stream_writer = await self._open_stream()
+        try:
+            responses, keep_alive = await self._pipeline_requests(stream_reader, stream_writer, request_list[:1])
+            if responses and keep_alive and len(request_list) > 1:
+                pipelined, keep_alive = await self._pipeline_requests(stream_reader, stream_writer, request_list[1:])
+                responses += pipelined
+        finally:
+            await self._close_stream(stream_writer)
+        
+        if not responses:
+            raise ConnectionError("Server closed the connection without responding")
+        
+        if len(responses) < len(request_list):
+            # Server answers one request per connection; fan out the rest
+            results = await asyncio.gather(
+                *(self._send_on_new_connection([request]) for request in request_list[len(responses):]))
+            for answered, _ in results:
+                if not answered:
+                    raise ConnectionError("Server closed the connection without responding")
+                responses += answered
+        return responses
+
+    def remove_files_from_server(self, target_filenames):
+        """Delete several files from the server in one batch"""
+        print(f"Deleting {len(target_filenames)} files: {', '.join(target_filenames)}")
+        try:
+            for server_response in asyncio.run(self.batch_delete(target_filenames)):
+                self.show_response(*self._split_response(server_response))
+        except asyncio.TimeoutError:
+            print("ERROR: Connection timed out")
+        except Exception as delete_error:
+            print(f"ERROR: {str(delete_error)}")
 
 def show_menu():
     """Display operation menu"""
@@ -163,7 +474,9 @@ def show_menu():
     print("1. View server files")
     print("2. Upload file to server")  
     print("3. Delete file from server")
-    print("4. Exit")
+    print("4. Download file from server")
+    print("5. Delete several files from server")
+    print("6. Exit")
     print("="*50)
 
 if __name__ == '__main__':
@@ -172,7 +485,7 @@ if __name__ == '__main__':
     
     while True:
         show_menu()
-        user_choice = input("\nChoose operation (1-4): ")
+        user_choice = input("\nChoose operation (1-6): ")
         
         if user_choice == '1':
             client.get_file_directory()
@@ -189,7 +502,21 @@ if __name__ == '__main__':
             else:
                 print("Invalid filename")
         elif user_choice == '4':
+            file_to_download = input("Enter filename to download: ")
+            if file_to_download:
+                client.download_file_from_server(file_to_download)
+            else:
+                print("Invalid filename")
+        elif user_choice == '5':
+            print("Enter filenames to delete, one per line (empty line to finish):")
+            target_files = list(iter(input, ''))
+            if target_files:
+                client.remove_files_from_server(target_files)
+            else:
+                print("Invalid filename")
+        elif user_choice == '6':
             print("Exiting client...")
+            client.close()
             break
         else:
-            print("Invalid choice. Please select 1-4.")
\ No newline at end of file
+            print("Invalid choice. Please select 1-6.")
\ No newline at end of file
@@ -6,14 +6,360 @@ from datetime import datetime
 import os
 import re
 import mimetypes
+import collections
+import time
+import email.utils
+import select
+import socket
+import struct
+import errno
+import stat
+import threading
+import queue
+import logging
+import logging.handlers
 from pathlib import Path
 
+# Matches the filename parameter of a multipart Content-Disposition header
+_FILENAME_RE = re.compile(rb'filename="([^"]*)"')
+
+# Patterns for the decoded Content-Type and Content-Disposition request headers
+_BOUNDARY_RE = re.compile(r'boundary=([^;]+)')
+_CD_FILENAME_RE = re.compile(r'filename="([^"]*)"')
+
+# Translation tables for changing the case of raw ASCII header bytes
+_LOWERCASE_TABLE = bytes.maketrans(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", b"abcdefghijklmnopqrstuvwxyz")
+_UPPERCASE_TABLE = bytes.maketrans(b"abcdefghijklmnopqrstuvwxyz", b"ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+
+# Second and formatted value of the last Date header, refreshed at most once a second
+_date_cache = [0, b""]
+
+def http_date():
+    """Return the current time formatted for the HTTP Date header, as bytes"""
+    current_second = int(time.time())
+    if current_second != _date_cache[0]:
+        _date_cache[:] = [current_second, email.utils.formatdate(current_second, usegmt=True).encode('ascii')]
+    return _date_cache[1]
+
+# Headers that are identical on every response
+_STATIC_HEADERS = b"Connection: close\r\nServer: AdvancedHttpServer/1.5\r\n"
+
+# Size of the pooled receive buffers used by the servers
+RECV_BUFFER_SIZE = 65536
+
+# Receive buffers are recycled across requests instead of being reallocated
+_POOL = collections.deque(maxlen=64)
+
+def acquire_buf(size=RECV_BUFFER_SIZE):
+    """Take a receive buffer from the pool, allocating a new one if it is empty
+
+    Lifetime rule: every memoryview over the buffer must be released, and
+    nothing derived from it may be kept, before it is handed to release_buf().
+    """
+    try:
+        buffer = _POOL.pop()
+    except IndexError:
+        return bytearray(size)
+    if len(buffer) < size:
+        buffer.extend(bytes(size - len(buffer)))
+    return buffer
+
+def release_buf(buffer):
+    """Return a receive buffer to the pool
+
+    Buffers that grew for a large request are shrunk back so the pool does
+    not pin their memory. Raises BufferError if a memoryview is still alive.
+    """
+    if len(buffer) > RECV_BUFFER_SIZE:
+        del buffer[RECV_BUFFER_SIZE:]
+    _POOL.append(buffer)
+
+def request_content_length(request_buffer, header_end):
+    """Return the Content-Length declared in a request's header block, or 0"""
+    header_block = request_buffer[:header_end].translate(_LOWERCASE_TABLE)
+    length_start = header_block.find(b'\ncontent-length:')
+    if length_start < 0:
+        return 0
+    length_start += len(b'\ncontent-length:')
+    length_end = header_block.find(b'\r', length_start)
+    try:
+        return max(0, int(header_block[length_start:length_end if length_end >= 0 else None]))
+    except ValueError:
+        return 0
+
+# Files at least this large are streamed with sendfile() instead of read into memory
+SENDFILE_THRESHOLD = 16 * 1024
+
+# Number of complete GET responses kept by each processor
+RESPONSE_CACHE_SIZE = 1024
+
+# Static files stay open between requests where reads need no shared file offset
+CACHE_OPEN_FILES = hasattr(os, 'sendfile') and hasattr(os, 'pread')
+OPEN_FILE_CACHE_SIZE = 128
+
+def write_file(file_path, file_data):
+    """Write an upload to disk, reserving its full size up front
+
+    posix_fallocate() lets the filesystem allocate the extents in one step
+    before the data is written, where the platform supports it.
+    """
+    file_fd = os.open(file_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_CLOEXEC', 0), 0o644)
+    try:
+        data_view = memoryview(file_data)
+        if data_view.nbytes and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(file_fd, 0, data_view.nbytes)
+            except OSError:
+                # Not supported by this filesystem; the write allocates instead
+                pass
+        
+        written = 0
+        while written < data_view.nbytes:
+            written += os.write(file_fd, data_view[written:])
+    finally:
+        os.close(file_fd)
+
+class CachedFile:
+    """Read-only descriptor for a static file, kept open across requests
+
+    Concurrent responses may share one instance, so all reads use explicit
+    offsets. The descriptor is closed only when the last reference is gone;
+    evicting it from the cache never closes it under a response that is
+    still being sent.
+    """
+    
+    def __init__(self, file_path):
+        # Set first so __del__ is safe if the open below fails
+        self.file_fd = -1
+        self.file_fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_CLOEXEC', 0))
+        file_stat = os.fstat(self.file_fd)
+        self.size = file_stat.st_size
+        self.validator = (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+        
+    def fileno(self):
+        return self.file_fd
+    
+    def read(self):
+        """Read the whole file without moving a shared offset"""
+        return os.pread(self.file_fd, self.size, 0)
+    
+    def __del__(self):
+        if self.file_fd >= 0:
+            os.close(self.file_fd)
+
+class FileResponse:
+    """HTTP response whose body is streamed from an open file"""
+    
+    def __init__(self, header_bytes, file_handle, content_length):
+        self.header_bytes = header_bytes
+        self.file_handle = file_handle
+        self.content_length = content_length
+        
+    def __len__(self):
+        return len(self.header_bytes) + self.content_length
+    
+    def close(self):
+        """Release the underlying file; cached files stay open for later requests"""
+        if not isinstance(self.file_handle, CachedFile):
+            self.file_handle.close()
+        self.file_handle = None
+
+def wait_writable(client_socket):
+    """Block until a non-blocking socket can accept more data
+
+    poll() is preferred because select() cannot watch descriptors above
+    FD_SETSIZE, which a server holding many connections can reach.
+    """
+    send_timeout = client_socket.gettimeout()
+    if hasattr(select, 'poll'):
+        poller = select.poll()
+        poller.register(client_socket, select.POLLOUT)
+        writable = poller.poll(None if send_timeout is None else send_timeout * 1000)
+    else:
+        _, writable, _ = select.select([], [client_socket], [], send_timeout)
+    if not writable:
+        raise socket.timeout("timed out waiting to send response")
+
+def send_file_body(client_socket, file_handle, content_length):
+    """Copy a file to the socket inside the kernel, returning bytes sent"""
+    if not hasattr(os, 'sendfile'):
+        # socket.sendfile() streams the file in blocks rather than reading it whole
+        return client_socket.sendfile(file_handle, 0, content_length)
+    
+    socket_fd = client_socket.fileno()
+    file_fd = file_handle.fileno()
+    offset = 0
+    while offset < content_length:
+        try:
+            sent = os.sendfile(socket_fd, file_fd, offset, content_length - offset)
+        except BlockingIOError:
+            # Sockets with a timeout are non-blocking underneath
+            wait_writable(client_socket)
+            continue
+        if sent == 0:  # File shrank while being sent
+            break
+        offset += sent
+    return offset
+
+# Linux zero-copy send constants (not exported by the socket module)
+SO_ZEROCOPY = getattr(socket, 'SO_ZEROCOPY', 60)
+MSG_ZEROCOPY = getattr(socket, 'MSG_ZEROCOPY', 0x4000000)
+SO_EE_ORIGIN_ZEROCOPY = 5
+
+# Below this size the completion notification and the wait for the peer's
+# ACK cost more than the copy it saves; files above SENDFILE_THRESHOLD
+# already go through sendfile(), so in practice only large listings qualify
+ZEROCOPY_THRESHOLD = 64 * 1024
+
+# Socket type flags that make the listener non-blocking and close-on-exec at creation (Linux)
+LISTENER_TYPE_FLAGS = getattr(socket, 'SOCK_NONBLOCK', 0) | getattr(socket, 'SOCK_CLOEXEC', 0)
+
+# Holds back a partial segment so it can share a packet with the data that follows
+MSG_MORE = getattr(socket, 'MSG_MORE', 0)
+
+# Send buffer size requested before streaming a file body
+BULK_SEND_BUFFER_SIZE = 1 << 20
+
+def tune_connection(client_socket):
+    """Disable Nagle's algorithm so small responses leave immediately"""
+    try:
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError:
+        pass
+
+def enlarge_send_buffer(client_socket):
+    """Request a larger kernel send buffer for a bulk response"""
+    try:
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, BULK_SEND_BUFFER_SIZE)
+    except OSError:
+        # The kernel may refuse or clamp the size; the default still works
+        pass
+
+def enable_zerocopy(client_socket):
+    """Turn on SO_ZEROCOPY for a connection, returning whether it is available"""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        client_socket.setsockopt(socket.SOL_SOCKET, SO_ZEROCOPY, 1)
+        return True
+    except OSError:
+        return False
+
+def wait_zerocopy_completions(client_socket, pending_sends):
+    """Drain MSG_ZEROCOPY completion notifications from the socket error queue
+
+    The kernel keeps reading the caller's buffers until each zero-copy send
+    has been acknowledged, so the buffers must stay alive until this returns.
+    """
+    poller = select.poll()
+    poller.register(client_socket, select.POLLERR)
+    socket_timeout = client_socket.gettimeout()
+    poll_timeout = None if socket_timeout is None else int(socket_timeout * 1000)
+    
+    while pending_sends > 0:
+        events = poller.poll(poll_timeout)
+        if not events:
+            raise socket.timeout("timed out waiting for zero-copy completion")
+        try:
+            _, ancillary_data, _, _ = client_socket.recvmsg(
+                0, socket.CMSG_SPACE(128), socket.MSG_ERRQUEUE | socket.MSG_DONTWAIT)
+        except BlockingIOError:
+            # Woken by something other than a notification
+            socket_error = client_socket.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+            if socket_error:
+                raise OSError(socket_error, os.strerror(socket_error))
+            if events[0][1] & (select.POLLHUP | select.POLLNVAL):
+                raise ConnectionError("connection closed before zero-copy send completed")
+            continue
+        
+        for _, _, extended_error in ancillary_data:
+            _, origin, _, _, _, first_id, last_id = struct.unpack_from('=IBBBBII', extended_error)
+            if origin == SO_EE_ORIGIN_ZEROCOPY:
+                pending_sends -= last_id - first_id + 1
+
+def send_buffers(client_socket, buffers, zerocopy=False):
+    """Send several buffers with gathered sendmsg() calls instead of joining them
+
+    With zerocopy set and a large enough payload, SO_ZEROCOPY is turned on
+    and the data is sent with MSG_ZEROCOPY. Falls back to one sendall() per
+    buffer where sendmsg is unavailable (e.g. Windows). Returns the number of bytes
+    sent.
+    """
+    total_length = sum(len(buffer) for buffer in buffers)
+    if not hasattr(client_socket, 'sendmsg'):
+        for buffer in buffers:
+            client_socket.sendall(buffer)
+        return total_length
+    
+    send_flags = 0
+    if zerocopy and total_length >= ZEROCOPY_THRESHOLD and enable_zerocopy(client_socket):
+        send_flags = MSG_ZEROCOPY
+    zerocopy_sends = 0
+    pending = [memoryview(buffer) for buffer in buffers if len(buffer)]
+    while pending:
+        try:
+            sent = client_socket.sendmsg(pending, [], send_flags)
+            if send_flags:
+                zerocopy_sends += 1
+        except OSError as send_error:
+            if not send_flags or send_error.errno != errno.ENOBUFS:
+                raise
+            # Out of option memory for pinned pages: copy this chunk instead
+            sent = client_socket.sendmsg(pending)
+        
+        # Drop fully written buffers and trim a partially written one
+        while pending and sent >= len(pending[0]):
+            sent -= len(pending[0])
+            pending.pop(0)
+        if sent:
+            pending[0] = pending[0][sent:]
+    
+    if zerocopy_sends:
+        wait_zerocopy_completions(client_socket, zerocopy_sends)
+    return total_length
+
+def send_response(client_socket, http_response, zerocopy=False):
+    """Write a response from AdvancedHttpProcessor to the client socket
+
+    Accepts either a (header_bytes, content_bytes) pair or a FileResponse
+    and returns the number of bytes written. File bodies always go through
+    sendfile(), which is already zero-copy.
+    """
+    if isinstance(http_response, FileResponse):
+        try:
+            enlarge_send_buffer(client_socket)
+            # MSG_MORE lets the headers leave in the same segment as the
+            # start of the file instead of as a packet of their own
+            client_socket.sendall(http_response.header_bytes, MSG_MORE)
+            body_sent = send_file_body(client_socket, http_response.file_handle, http_response.content_length)
+            return len(http_response.header_bytes) + body_sent
+        finally:
+            http_response.close()
+    
+    return send_buffers(client_socket, http_response, zerocopy)
+
+def start_log_listener():
+    """Route log records through a queue so formatting and writing happen off the request path
+
+    The root logger's current handlers move to the listener thread. Call
+    once per process; threads do not survive fork(), so every worker starts
+    its own. Returns the started QueueListener; call stop() on it to flush
+    pending records.
+    """
+    root_logger = logging.getLogger()
+    log_queue = queue.SimpleQueue()
+    log_listener = logging.handlers.QueueListener(log_queue, *root_logger.handlers, respect_handler_level=True)
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    log_listener.start()
+    return log_listener
+
 class AdvancedHttpProcessor:
     """Enhanced HTTP request processor with advanced file operations"""
     
-    def __init__(self, storage_path="server_files"):
+    def __init__(self, storage_path="server_files", enable_zerocopy=True):
         self.client_sessions = {}
         self.storage_directory = storage_path
+        self.enable_zerocopy = enable_zerocopy
         self.content_type_mappings = {
             '.pdf': 'application/pdf',
             '.jpg': 'image/jpeg',
@@ -33,70 +379,172 @@ class AdvancedHttpProcessor:
             '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
             '.bin': 'application/octet-stream'
         }
+        # Pre-encoded Content-Type header lines, one per known extension
+        self.content_type_lines = {
+            extension: f"Content-Type: {mime_type}\r\n".encode('ascii')
+            for extension, mime_type in self.content_type_mappings.items()
+        }
+        self.default_content_type_line = b"Content-Type: application/octet-stream\r\n"
+        # Complete responses for constant endpoints; only the Date is filled in per request
+        self.fixed_responses = {
+            request_path: self.build_fixed_response(fixed_body)
+            for request_path, fixed_body in (
+                ('/', b'Advanced HTTP File Server - Upload files to /file-upload'),
+                ('/status', b'Server is running normally'),
+            )
+        }
+        # Open descriptors for recently served files, keyed by path
+        self.open_files = {}
+        self.open_files_lock = threading.Lock()
+        # Recent GET responses in least-recently-used order, keyed by header
+        # block; all belong to the (storage mtime, Date) generation in
+        # response_cache_tag and are dropped together when it changes
+        self.response_cache = collections.OrderedDict()
+        self.response_cache_tag = None
+        self.response_cache_lock = threading.Lock()
         self.initialize_storage()
         
+    def prepare_connection(self, client_socket):
+        """Apply per-connection socket options, returning whether zero-copy sends may be used
+
+        SO_ZEROCOPY itself is only set by send_buffers() once a payload is
+        large enough to use it; most responses never are.
+        """
+        tune_connection(client_socket)
+        return self.enable_zerocopy
+        
+    def get_cached_file(self, file_path):
+        """Return an open CachedFile for file_path, reopening it if the file changed
+
+        One stat() validates the cached descriptor, replacing the open,
+        fstat and close a GET would otherwise need. Raises FileNotFoundError
+        for missing paths and anything that is not a regular file.
+        """
+        file_stat = os.stat(file_path)
+        if not stat.S_ISREG(file_stat.st_mode):
+            raise FileNotFoundError(file_path)
+        
+        cached_file = self.open_files.get(file_path)
+        if cached_file is not None and cached_file.validator == (file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns):
+            return cached_file
+        
+        cached_file = CachedFile(file_path)
+        with self.open_files_lock:
+            if file_path not in self.open_files and len(self.open_files) >= OPEN_FILE_CACHE_SIZE:
+                # Evict the oldest entry
+                del self.open_files[next(iter(self.open_files))]
+            self.open_files[file_path] = cached_file
+        return cached_file
+        
+    def forget_cached_file(self, file_path):
+        """Drop the cached descriptor for a file that was replaced or removed"""
+        with self.open_files_lock:
+            self.open_files.pop(file_path, None)
+        
     def initialize_storage(self):
         """Create storage directory if it doesn't exist"""
         if not os.path.exists(self.storage_directory):
             os.makedirs(self.storage_directory)
             print(f"Created storage directory: {self.storage_directory}")
         
-    def build_response(self, status_code=404, status_text='Not Found', content=bytes(), extra_headers={}):
-        """Build HTTP response with headers and content"""
-        current_time = datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')
+    def build_headers_raw(self, status_code, status_text, content_length, extra_header_bytes=b""):
+        """Build the status line and header block from pre-encoded extra header lines"""
+        return b"HTTP/1.1 %d %s\r\nDate: %s\r\n%sContent-Length: %d\r\n%s\r\n" % (
+            status_code, status_text.encode('ascii'), http_date(),
+            _STATIC_HEADERS, content_length, extra_header_bytes
+        )
         
-        response_headers = [
-            f"HTTP/1.1 {status_code} {status_text}\r\n",
-            f"Date: {current_time}\r\n",
-            "Connection: close\r\n",
-            "Server: AdvancedHttpServer/1.5\r\n",
-            f"Content-Length: {len(content)}\r\n"
-        ]
+    def build_fixed_response(self, content):
+        """Build a 200 response for a constant body as a header template with a Date slot"""
+        header_template = b"HTTP/1.1 200 OK\r\nDate: %%s\r\n%sContent-Length: %d\r\n\r\n" % (
+            _STATIC_HEADERS, len(content)
+        )
+        return header_template, content
         
+    def build_headers(self, status_code, status_text, content_length, extra_headers={}):
+        """Build the status line and header block of an HTTP response"""
         # Add additional headers
-        for header_name, header_value in extra_headers.items():
-            response_headers.append(f"{header_name}: {header_value}\r\n")
+        extra_header_bytes = b"".join(
+            f"{header_name}: {header_value}\r\n".encode('utf-8')
+            for header_name, header_value in extra_headers.items()
+        )
+        return self.build_headers_raw(status_code, status_text, content_length, extra_header_bytes)
         
-        response_headers.append("\r\n")
-        header_section = "".join(response_headers)
+    def build_response_raw(self, status_code, status_text, content, extra_header_bytes=b""):
+        """Build a (header_bytes, content_bytes) pair from pre-encoded extra header lines"""
+        # Ensure content is in bytes format
+        if not isinstance(content, bytes):
+            content = content.encode('utf-8')
+            
+        return self.build_headers_raw(status_code, status_text, len(content), extra_header_bytes), content
         
+    def build_response(self, status_code=404, status_text='Not Found', content=bytes(), extra_headers={}):
+        """Build HTTP response as a (header_bytes, content_bytes) pair
+
+        The two parts are kept separate so the server can hand both to a
+        single sendmsg() call without concatenating them.
+        """
         # Ensure content is in bytes format
         if not isinstance(content, bytes):
             content = content.encode('utf-8')
             
-        return header_section.encode('utf-8') + content
+        return self.build_headers(status_code, status_text, len(content), extra_headers), content
+
+    def build_file_response(self, file_handle, file_size, extra_header_bytes=b""):
+        """Build a 200 response whose body is sent straight from an open file"""
+        header_bytes = self.build_headers_raw(200, 'OK', file_size, extra_header_bytes)
+        return FileResponse(header_bytes, file_handle, file_size)
+
+    def content_type_line(self, file_name):
+        """Return the cached Content-Type header line for a file name"""
+        extension_pos = file_name.rfind('.')
+        # A leading dot (hidden file) is not an extension, matching os.path.splitext
+        if extension_pos <= file_name.rfind('/') + 1:
+            return self.default_content_type_line
+        return self.content_type_lines.get(file_name[extension_pos:].lower(), self.default_content_type_line)
+
+    def parse_form_data(self, request_buffer, body_start, body_end, boundary_string):
+        """Parse multipart form data for file uploads
 
-    def parse_form_data(self, request_body, boundary_string):
-        """Parse multipart form data for file uploads"""
+        The body is request_buffer[body_start:body_end]. It is scanned in
+        place with find(); the file content is returned as a memoryview
+        slice so it is never copied.
+        """
         try:
             if isinstance(boundary_string, str):
                 boundary_string = boundary_string.encode('utf-8')
-                
-            form_parts = request_body.split(b'--' + boundary_string)
             
-            for part in form_parts:
-                if b'Content-Disposition' in part and b'filename=' in part:
-                    # Extract filename with regex
-                    filename_regex = rb'filename="([^"]*)"'
-                    match = re.search(filename_regex, part)
-                    if not match:
-                        continue
-                    
-                    filename = match.group(1).decode('utf-8')
-                    # Security: prevent directory traversal
-                    filename = os.path.basename(filename)
-                    
-                    # Find content after double CRLF
-                    content_start_pos = part.find(b'\r\n\r\n')
-                    if content_start_pos == -1:
-                        continue
-                    
-                    file_content = part[content_start_pos + 4:]
-                    # Clean trailing CRLF
-                    if file_content.endswith(b'\r\n'):
-                        file_content = file_content[:-2]
+            delimiter = b'--' + boundary_string
+            body_view = memoryview(request_buffer)
+            part_start = request_buffer.find(delimiter, body_start, body_end)
+            
+            while part_start >= 0:
+                part_start += len(delimiter)
+                part_end = request_buffer.find(delimiter, part_start, body_end)
+                if part_end < 0:
+                    part_end = body_end
+                
+                # Only the part headers are inspected, never the file content
+                header_end = request_buffer.find(b'\r\n\r\n', part_start, part_end)
+                if header_end >= 0:
+                    part_headers = bytes(body_view[part_start:header_end])
+                    match = None
+                    if b'Content-Disposition' in part_headers and b'filename=' in part_headers:
+                        match = _FILENAME_RE.search(part_headers)
                     
-                    return filename, file_content
+                    if match:
+                        filename = match.group(1).decode('utf-8')
+                        # Security: prevent directory traversal
+                        filename = os.path.basename(filename)
+                        
+                        # Clean trailing CRLF
+                        content_end = part_end
+                        if body_view[content_end - 2:content_end] == b'\r\n':
+                            content_end -= 2
+                        
+                        return filename, body_view[header_end + 4:content_end]
+                
+                part_start = part_end if part_end < body_end else -1
             
             return None, None
             
@@ -104,44 +552,132 @@ class AdvancedHttpProcessor:
             print(f"Form data parsing error: {parse_error}")
             return None, None
 
-    def handle_request(self, request_data):
-        """Main request handler - processes incoming HTTP requests"""
+    def parse_headers(self, header_section, line_start):
+        """Parse raw header lines into a dictionary keyed by lowercase name
+
+        Works directly on the undecoded bytes in a single pass; only the
+        final key and value of each header are decoded.
+        """
+        request_headers = {}
+        section_length = len(header_section)
+        
+        while line_start < section_length:
+            line_end = header_section.find(b"\r\n", line_start)
+            if line_end < 0:
+                line_end = section_length
+            
+            colon_pos = header_section.find(b":", line_start, line_end)
+            if colon_pos >= 0:
+                key = header_section[line_start:colon_pos].strip(b" \t").translate(_LOWERCASE_TABLE)
+                value = header_section[colon_pos + 1:line_end].strip(b" \t")
+                request_headers[key.decode('ascii')] = value.decode('utf-8')
+            
+            line_start = line_end + 2
+        
+        return request_headers
+
+    def response_cache_key(self, request_data, request_length=None):
+        """Return (header block, generation tag) for a cacheable GET, or None
+
+        The tag pairs the storage directory's mtime with the current Date
+        value, so an entry is never served once the stored files change or
+        for longer than the second it was built in. Requests carrying
+        credentials are never cached.
+        """
+        if not isinstance(request_data, (bytes, bytearray)):
+            return None
+        if request_length is None:
+            request_length = len(request_data)
+        if not request_data.startswith(b"GET ", 0, request_length):
+            return None
+        
+        header_end = request_data.find(b"\r\n\r\n", 0, request_length)
+        if header_end < 0:
+            return None
+        header_section = bytes(request_data[:header_end])
+        lowercase_headers = header_section.translate(_LOWERCASE_TABLE)
+        if b"\ncookie:" in lowercase_headers or b"\nauthorization:" in lowercase_headers:
+            return None
+        
+        try:
+            storage_version = os.stat(self.storage_directory).st_mtime_ns
+        except OSError:
+            return None
+        return header_section, (storage_version, http_date())
+        
+    def handle_request(self, request_data, request_length=None):
+        """Main request handler; repeated identical GETs are answered from the response cache
+
+        request_data is bytes or a bytearray. With request_length set only
+        that prefix of it is the request, so a receive buffer can be passed
+        without slicing or copying it.
+        """
+        cache_entry = self.response_cache_key(request_data, request_length)
+        if cache_entry is None:
+            return self.process_request(request_data, request_length)
+        cache_key, cache_tag = cache_entry
+        
+        with self.response_cache_lock:
+            if cache_tag != self.response_cache_tag:
+                # Entries from an earlier generation can never be hit again
+                self.response_cache.clear()
+                self.response_cache_tag = cache_tag
+            cached_response = self.response_cache.get(cache_key)
+            if cached_response is not None:
+                self.response_cache.move_to_end(cache_key)
+                return cached_response
+        
+        http_response = self.process_request(request_data, request_length)
+        
+        # Streamed files hold an open descriptor and server errors may be transient
+        if isinstance(http_response, tuple) and http_response[0][9:10] != b"5":
+            with self.response_cache_lock:
+                if cache_tag != self.response_cache_tag:
+                    return http_response
+                self.response_cache[cache_key] = http_response
+                if len(self.response_cache) > RESPONSE_CACHE_SIZE:
+                    self.response_cache.popitem(last=False)
+        return http_response
+        
+    def process_request(self, request_data, request_length=None):
+        """Parse an incoming HTTP request and route it to its handler"""
         try:
             # Validate input data
-            if not isinstance(request_data, bytes):
+            if not isinstance(request_data, (bytes, bytearray)):
                 return self.build_response(400, 'Bad Request', 'Invalid request format')
+            if request_length is None:
+                request_length = len(request_data)
             
-            # Split headers and body
-            header_boundary = request_data.find(b"\r\n\r\n")
+            # Split headers and body; only the headers are copied, the body
+            # stays in the receive buffer
+            header_boundary = request_data.find(b"\r\n\r\n", 0, request_length)
             if header_boundary < 0:
                 return self.build_response(400, 'Bad Request', 'Malformed HTTP request')
             
-            header_section = request_data[:header_boundary]
-            request_body = request_data[header_boundary+4:]
+            header_section = bytes(request_data[:header_boundary])
             
             try:
-                # Parse HTTP request line and headers
-                header_lines = header_section.decode('utf-8').split("\r\n")
-                request_line_parts = header_lines[0].split(" ")
+                # Parse HTTP request line
+                request_line_end = header_section.find(b"\r\n")
+                if request_line_end < 0:
+                    request_line_end = len(header_section)
+                request_line_parts = header_section[:request_line_end].split(b" ")
                 
                 if len(request_line_parts) < 3:
                     return self.build_response(400, 'Bad Request', 'Invalid HTTP request line')
                 
-                http_method, request_path, http_version = request_line_parts[0], request_line_parts[1], request_line_parts[2]
-                http_method = http_method.upper()
+                http_method = request_line_parts[0].translate(_UPPERCASE_TABLE).decode('ascii')
+                request_path = request_line_parts[1].decode('utf-8')
+                http_version = request_line_parts[2].decode('ascii')
                 
                 # Parse headers into dictionary
-                request_headers = {}
-                for header in header_lines[1:]:
-                    if ':' in header:
-                        key, value = header.split(':', 1)
-                        request_headers[key.strip().lower()] = value.strip()
+                request_headers = self.parse_headers(header_section, request_line_end + 2)
                 
                 print(f"Handling request: {http_method} {request_path}")
                 
                 # Route to appropriate handler
                 if http_method == 'POST' and request_path == '/file-upload':
-                    return self.handle_upload(request_body, request_headers)
+                    return self.handle_upload(request_data, header_boundary + 4, request_length, request_headers)
                 elif http_method == 'GET':
                     return self.handle_get(request_path, request_headers)
                 elif http_method == 'DELETE':
@@ -156,19 +692,19 @@ class AdvancedHttpProcessor:
             print(f"Request handling error: {handler_error}")
             return self.build_response(500, 'Internal Server Error', str(handler_error))
 
-    def handle_upload(self, request_body, headers_dict):
-        """Process file upload requests"""
+    def handle_upload(self, request_buffer, body_start, body_end, headers_dict):
+        """Process file upload requests whose body is request_buffer[body_start:body_end]"""
         try:
             content_type = headers_dict.get('content-type', '')
             
             if 'multipart/form-data' in content_type:
                 # Handle multipart upload
-                boundary_match = re.search(r'boundary=([^;]+)', content_type)
+                boundary_match = _BOUNDARY_RE.search(content_type)
                 if not boundary_match:
                     return self.build_response(400, 'Bad Request', 'Boundary not found in multipart request')
                 
                 boundary = boundary_match.group(1)
-                filename, file_data = self.parse_form_data(request_body, boundary)
+                filename, file_data = self.parse_form_data(request_buffer, body_start, body_end, boundary)
                 
                 if not filename or file_data is None:
                     return self.build_response(400, 'Bad Request', 'No valid file found in request')
@@ -179,14 +715,14 @@ class AdvancedHttpProcessor:
                 if not filename:
                     # Try Content-Disposition header as fallback
                     content_disposition = headers_dict.get('content-disposition', '')
-                    filename_match = re.search(r'filename="([^"]*)"', content_disposition)
+                    filename_match = _CD_FILENAME_RE.search(content_disposition)
                     if filename_match:
                         filename = filename_match.group(1)
                 
                 if not filename:
                     filename = f'uploaded_file_{int(datetime.now().timestamp())}'
                     
-                file_data = request_body
+                file_data = memoryview(request_buffer)[body_start:body_end]
             
             # Validate filename
             if not filename:
@@ -199,8 +735,11 @@ class AdvancedHttpProcessor:
             
             # Save file to storage directory
             file_path = os.path.join(self.storage_directory, safe_filename)
-            with open(file_path, 'wb') as output_file:
-                output_file.write(file_data)
+            write_file(file_path, file_data)
+            self.forget_cached_file(file_path)
+            # Overwriting a file leaves the directory untouched; bump its mtime
+            # so cached GET responses in every worker are invalidated
+            os.utime(self.storage_directory)
             
             success_msg = f'File {safe_filename} uploaded successfully ({len(file_data)} bytes)'
             return self.build_response(201, 'Created', success_msg)
@@ -210,28 +749,23 @@ class AdvancedHttpProcessor:
 
     def handle_get(self, request_path, headers_dict):
         """Handle GET requests for files and directory listing"""
-        if request_path == '/':
-            welcome_message = 'Advanced HTTP File Server - Upload files to /file-upload'
-            return self.build_response(200, 'OK', welcome_message)
+        fixed_response = self.fixed_responses.get(request_path)
+        if fixed_response is not None:
+            header_template, content = fixed_response
+            return header_template % http_date(), content
             
         elif request_path == '/redirect':
             return self.build_response(302, 'Found', '', {'Location': 'https://youtu.be/dQw4w9WgXcQ'})
             
-        elif request_path == '/status':
-            return self.build_response(200, 'OK', 'Server is running normally')
-            
         elif request_path == '/directory':
             try:
-                # List files in storage directory
-                file_entries = []
-                for item in os.listdir(self.storage_directory):
-                    item_path = os.path.join(self.storage_directory, item)
-                    if os.path.isfile(item_path):
-                        file_size = os.path.getsize(item_path)
-                        file_entries.append(f"{item} ({file_size} bytes)")
+                # List files in storage directory; DirEntry caches the stat result
+                with os.scandir(self.storage_directory) as directory_entries:
+                    file_entries = [f"{entry.name} ({entry.stat().st_size} bytes)"
+                                    for entry in directory_entries if entry.is_file()]
                 
                 file_listing = "\n".join(file_entries) if file_entries else "No files in directory"
-                return self.build_response(200, 'OK', file_listing, {'Content-Type': 'text/plain'})
+                return self.build_response_raw(200, 'OK', file_listing, self.content_type_lines['.txt'])
                 
             except Exception as listing_error:
                 return self.build_response(500, 'Server Error', str(listing_error))
@@ -240,19 +774,36 @@ class AdvancedHttpProcessor:
         requested_file = request_path[1:]  # Remove leading slash
         full_file_path = os.path.join(self.storage_directory, requested_file)
         
-        if not requested_file or not os.path.isfile(full_file_path):
+        if not requested_file:
             return self.build_response(404, 'Not Found', f'File {requested_file} not found')
         
         try:
-            with open(full_file_path, 'rb') as file_handle:
-                file_content = file_handle.read()
-            
             # Determine MIME type
-            file_extension = os.path.splitext(requested_file)[1].lower()
-            mime_type = self.content_type_mappings.get(file_extension, 'application/octet-stream')
+            content_type_line = self.content_type_line(requested_file)
             
-            return self.build_response(200, 'OK', file_content, {'Content-Type': mime_type})
+            if CACHE_OPEN_FILES:
+                file_handle = self.get_cached_file(full_file_path)
+                file_size = file_handle.size
+            else:
+                if not os.path.isfile(full_file_path):
+                    raise FileNotFoundError(full_file_path)
+                file_handle = open(full_file_path, 'rb')
+                file_size = os.fstat(file_handle.fileno()).st_size
+            
+            # Large files are streamed by the server with sendfile()
+            if file_size >= SENDFILE_THRESHOLD:
+                return self.build_file_response(file_handle, file_size, content_type_line)
             
+            try:
+                file_content = file_handle.read()
+            finally:
+                if not CACHE_OPEN_FILES:
+                    file_handle.close()
+            
+            return self.build_response_raw(200, 'OK', file_content, content_type_line)
+            
+        except (FileNotFoundError, NotADirectoryError):
+            return self.build_response(404, 'Not Found', f'File {requested_file} not found')
         except Exception as serve_error:
             return self.build_response(500, 'Internal Server Error', str(serve_error))
 
@@ -266,6 +817,7 @@ class AdvancedHttpProcessor:
         
         try:
             os.remove(full_file_path)
+            self.forget_cached_file(full_file_path)
             success_msg = f'File {requested_file} deleted successfully'
             return self.build_response(200, 'OK', success_msg)
             
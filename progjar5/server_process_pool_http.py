@@ -4,10 +4,9 @@ import signal
 import sys
 import time
 import logging
+import select
 import os
-import threading
-from queue import Empty
-from http import AdvancedHttpProcessor
+from http import AdvancedHttpProcessor, send_response, acquire_buf, release_buf, request_content_length, start_log_listener, LISTENER_TYPE_FLAGS
 
 # Configure logging
 logging.basicConfig(
@@ -17,13 +16,108 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def worker_process_function(request_queue, worker_number, bind_address, bind_port):
-    """Main function for worker processes"""
+# Largest request a worker will buffer
+MAX_REQUEST_SIZE = 25 * 1024 * 1024  # 25MB limit
+
+# Seconds between runtime log lines
+STATS_INTERVAL = 90
+
+# Only Linux balances connections across SO_REUSEPORT listeners; elsewhere the
+# parent accepts and passes each connection to a worker with SCM_RIGHTS
+REUSEPORT_BALANCING = sys.platform.startswith('linux') and hasattr(socket, 'SO_REUSEPORT')
+
+def create_listener_socket(bind_address, bind_port, reuse_port=True):
+    """Create a listening socket that shares its port with the other workers
+
+    With SO_REUSEPORT every worker binds the same address and the kernel
+    spreads incoming connections across them. The socket is non-blocking:
+    workers only accept after select() reports it readable.
+    """
+    listener_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM | LISTENER_TYPE_FLAGS)
+    if not LISTENER_TYPE_FLAGS:
+        listener_socket.setblocking(False)
+    listener_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        listener_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    listener_socket.bind((bind_address, bind_port))
+    listener_socket.listen(128)
+    return listener_socket
+
+def pin_worker_to_cpu(worker_number):
+    """Pin the worker to one of the CPUs it may run on, where the platform allows it
+
+    A worker that stays on one core keeps its buffers and processor state
+    warm in that core's caches. Returns the chosen CPU, or None.
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    try:
+        allowed_cpus = sorted(os.sched_getaffinity(0))
+        chosen_cpu = allowed_cpus[(worker_number - 1) % len(allowed_cpus)]
+        os.sched_setaffinity(0, {chosen_cpu})
+        return chosen_cpu
+    except OSError as affinity_error:
+        logger.warning(f"Worker {worker_number}: could not set CPU affinity - {affinity_error}")
+        return None
+
+def pack_client_address(client_address):
+    """Encode an IPv4 peer address as 6 bytes to travel alongside its descriptor"""
+    return socket.inet_aton(client_address[0]) + client_address[1].to_bytes(2, 'big')
+
+def unpack_client_address(address_bytes):
+    """Decode a peer address written by pack_client_address()"""
+    return socket.inet_ntoa(address_bytes[:4]), int.from_bytes(address_bytes[4:6], 'big')
+
+def wait_for_connection(connection_source, shutdown_reader):
+    """Block until connection_source is readable; False once the parent asks for shutdown"""
+    while True:
+        try:
+            ready_sources, _, _ = select.select([connection_source, shutdown_reader], [], [])
+        except InterruptedError:
+            continue
+        return shutdown_reader not in ready_sources
+
+def receive_connections(connection_channel, shutdown_reader):
+    """Yield (client_socket, client_address) pairs passed in by the parent"""
+    while wait_for_connection(connection_channel, shutdown_reader):
+        try:
+            address_bytes, passed_fds, _, _ = socket.recv_fds(connection_channel, 64, 1)
+        except InterruptedError:
+            continue
+        if not passed_fds:
+            continue
+        yield socket.socket(fileno=passed_fds[0]), unpack_client_address(address_bytes)
+
+def accept_connections(listener_socket, worker_number, shutdown_reader):
+    """Yield (client_socket, client_address) pairs accepted on the worker's own listener"""
+    while wait_for_connection(listener_socket, shutdown_reader):
+        try:
+            # Accept directly; the kernel balances connections across workers
+            yield listener_socket.accept()
+        except (BlockingIOError, InterruptedError):
+            # The client went away between select() and accept()
+            continue
+        except OSError as accept_error:
+            logger.error(f"Worker {worker_number}: accept failed - {accept_error}")
+
+def worker_process_function(worker_number, bind_address, bind_port, request_processor, shutdown_reader, connection_channel=None):
+    """Main function for worker processes
+
+    Workers accept on their own SO_REUSEPORT listener, or receive connections
+    from the parent over connection_channel where the kernel does not
+    balance SO_REUSEPORT listeners. A byte on shutdown_reader makes the
+    worker exit after the request it is handling.
+    """
+    # Only workers log through a listener thread; the parent must not run one while it forks
+    log_listener = start_log_listener()
     logger.info(f"Worker process {worker_number} started (PID: {os.getpid()})")
     
-    # Initialize HTTP processor for this worker
-    request_processor = AdvancedHttpProcessor()
+    pinned_cpu = pin_worker_to_cpu(worker_number)
+    if pinned_cpu is not None:
+        logger.info(f"Worker {worker_number} pinned to CPU {pinned_cpu}")
+    
     handled_requests = 0
+    listener_socket = None
     
     # Setup signal handlers for graceful shutdown
     def shutdown_signal_handler(signal_num, frame):
@@ -31,69 +125,103 @@ def worker_process_function(request_queue, worker_number, bind_address, bind_por
         sys.exit(0)
     
     signal.signal(signal.SIGTERM, shutdown_signal_handler)
-    signal.signal(signal.SIGINT, shutdown_signal_handler)
+    # Ctrl+C reaches the whole process group; the parent coordinates shutdown
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
     
     try:
-        while True:
-            try:
-                # Retrieve connection from queue with timeout
-                connection_data = request_queue.get(timeout=2)
-                
-                if connection_data is None:  # Shutdown signal
-                    logger.info(f"Worker {worker_number} received shutdown command")
-                    break
-                
-                client_socket, client_address = connection_data
-                handled_requests += 1
-                logger.info(f"Worker {worker_number} processing request #{handled_requests} from {client_address}")
-                
-                # Handle the client request
-                handle_client_connection(client_socket, client_address, request_processor, worker_number)
-                
-            except:
-                # Timeout or other error - continue
-                continue
+        if connection_channel is not None:
+            incoming_connections = receive_connections(connection_channel, shutdown_reader)
+        else:
+            listener_socket = create_listener_socket(bind_address, bind_port)
+            logger.info(f"Worker {worker_number} listening on {bind_address}:{bind_port}")
+            incoming_connections = accept_connections(listener_socket, worker_number, shutdown_reader)
+        
+        for client_socket, client_address in incoming_connections:
+            handled_requests += 1
+            logger.debug("Worker %d processing request #%d from %s", worker_number, handled_requests, client_address)
+            
+            # Handle the client request
+            handle_client_connection(client_socket, client_address, request_processor, worker_number)
                 
     except KeyboardInterrupt:
         logger.info(f"Worker {worker_number} interrupted by user")
+    except OSError as socket_error:
+        logger.error(f"Worker {worker_number}: listener setup failed - {socket_error}")
     finally:
+        if listener_socket:
+            listener_socket.close()
         logger.info(f"Worker {worker_number} handled {handled_requests} requests, terminating")
+        log_listener.stop()
 
 def handle_client_connection(client_socket, client_address, processor, worker_id):
     """Process individual client connection in worker process"""
     try:
         client_socket.settimeout(30.0)
+        zerocopy_enabled = processor.prepare_connection(client_socket)
         
-        # Read incoming request data
-        incoming_data = bytearray()
-        while True:
-            try:
-                data_chunk = client_socket.recv(16384)
-                if not data_chunk:
-                    break
-                
-                incoming_data.extend(data_chunk)
-                
-                # Check for complete HTTP request
-                if b'\r\n\r\n' in incoming_data:
-                    break
-                
-                # Prevent excessive memory usage
-                if len(incoming_data) > 25 * 1024 * 1024:  # 25MB limit
-                    logger.warning(f"Worker {worker_id}: Request size exceeded limit")
-                    break
+        # Read incoming request data into a pooled buffer
+        incoming_data = acquire_buf()
+        received = 0
+        expected_size = None
+        request_too_large = False
+        try:
+            while True:
+                try:
+                    if received == len(incoming_data):
+                        # Prevent excessive memory usage
+                        if received > MAX_REQUEST_SIZE:
+                            logger.warning(f"Worker {worker_id}: Request size exceeded limit")
+                            break
+                        incoming_data.extend(bytes(len(incoming_data)))
                     
-            except socket.timeout:
-                logger.warning(f"Worker {worker_id}: Client read timeout")
-                break
-        
-        if incoming_data:
-            # Process the HTTP request
-            http_response = processor.handle_request(bytes(incoming_data))
+                    with memoryview(incoming_data) as buffer_view:
+                        bytes_read = client_socket.recv_into(buffer_view[received:])
+                    if not bytes_read:
+                        break
+                    received += bytes_read
+                    
+                    if expected_size is None:
+                        # Check for complete headers; only the new bytes (plus
+                        # 3 for a terminator split across reads) need scanning
+                        header_end = incoming_data.find(b'\r\n\r\n', max(0, received - bytes_read - 3), received)
+                        if header_end < 0:
+                            continue
+                        
+                        # The request ends after the declared body
+                        expected_size = header_end + 4 + request_content_length(incoming_data, header_end)
+                        if expected_size > MAX_REQUEST_SIZE:
+                            logger.warning(f"Worker {worker_id}: Request size exceeded limit")
+                            request_too_large = True
+                            break
+                        if expected_size > len(incoming_data):
+                            # Grow once to the full request size
+                            incoming_data.extend(bytes(expected_size - len(incoming_data)))
+                    
+                    if received >= expected_size:
+                        break
+                        
+                except socket.timeout:
+                    logger.warning(f"Worker {worker_id}: Client read timeout")
+                    break
             
-            # Send response back to client
-            client_socket.sendall(http_response)
-            logger.debug(f"Worker {worker_id}: Response transmitted ({len(http_response)} bytes)")
+            if request_too_large:
+                http_response = processor.build_response(413, 'Payload Too Large', 'Request exceeds the size limit')
+                send_response(client_socket, http_response)
+            elif expected_size is not None and received < expected_size:
+                # The client stopped before the end of its declared body;
+                # refuse it rather than save a truncated upload
+                logger.warning(f"Worker {worker_id}: Body shorter than Content-Length")
+                http_response = processor.build_response(400, 'Bad Request', 'Incomplete request body')
+                send_response(client_socket, http_response)
+            elif received:
+                # Process the HTTP request straight from the pooled buffer
+                http_response = processor.handle_request(incoming_data, received)
+                
+                # Send response back to client
+                bytes_sent = send_response(client_socket, http_response, zerocopy_enabled)
+                logger.debug("Worker %d: Response transmitted (%d bytes)", worker_id, bytes_sent)
+        finally:
+            release_buf(incoming_data)
         
     except Exception as connection_error:
         logger.error(f"Worker {worker_id}: Connection handling error - {connection_error}")
@@ -110,40 +238,45 @@ class ProcessPoolHttpServer:
         self.bind_address = bind_host
         self.bind_port = bind_port
         self.process_count = process_count
-        self.server_socket = None
         self.server_active = False
         self.worker_pool = []
-        self.request_queue = None
+        self.request_processor = None
+        # Write ends of the per-worker shutdown pipes
+        self.shutdown_pipes = []
+        self.startup_time = 0.0
+        self.next_stats_at = 0.0
+        # Used only when the parent accepts and hands connections to workers
+        self.server_socket = None
+        self.worker_channels = []
         
     def configure_server_socket(self):
-        """Configure and bind server socket"""
+        """Check that the port can be bound before the workers are started"""
         try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if not REUSEPORT_BALANCING:
+                self.server_socket = create_listener_socket(self.bind_address, self.bind_port, reuse_port=False)
+                self.server_socket.settimeout(1.0)
+                logger.info(f"Server socket configured on {(self.bind_address, self.bind_port)}")
+                return True
             
-            server_endpoint = (self.bind_address, self.bind_port)
-            self.server_socket.bind(server_endpoint)
-            self.server_socket.listen(60)
+            # Workers open their own listeners; this probe is closed straight away
+            probe_socket = create_listener_socket(self.bind_address, self.bind_port)
+            probe_socket.close()
             
-            logger.info(f"Server socket configured on {server_endpoint}")
+            logger.info(f"Server port {self.bind_port} available on {self.bind_address}")
             return True
             
         except Exception as socket_error:
             logger.error(f"Socket configuration failed: {socket_error}")
             return False
     
-    def track_server_statistics(self):
-        """Track and log server performance statistics"""
-        startup_time = time.time()
-        
-        while self.server_active:
-            try:
-                time.sleep(90)  # Report every 90 seconds
-                runtime = time.time() - startup_time
-                active_workers = sum(1 for w in self.worker_pool if w.is_alive())
-                logger.info(f"Server runtime: {runtime:.1f}s, Active processes: {active_workers}")
-            except Exception:
-                break
+    def report_statistics(self):
+        """Log runtime and worker counts when the reporting interval has elapsed"""
+        current_time = time.monotonic()
+        if current_time >= self.next_stats_at:
+            runtime = current_time - self.startup_time
+            active_workers = sum(1 for w in self.worker_pool if w.is_alive())
+            logger.info(f"Server runtime: {runtime:.1f}s, Active processes: {active_workers}")
+            self.next_stats_at = current_time + STATS_INTERVAL
     
     def start_server(self):
         """Start the process pool HTTP server"""
@@ -153,57 +286,90 @@ class ProcessPoolHttpServer:
             logger.error("Failed to configure server socket")
             return
         
-        # Create request queue for inter-process communication
-        self.request_queue = mp.Queue(maxsize=150)
-        
         # Setup signal handlers for clean shutdown
         signal.signal(signal.SIGINT, self.signal_shutdown_handler)
         signal.signal(signal.SIGTERM, self.signal_shutdown_handler)
         
         self.server_active = True
         
+        # Built once before forking so workers share its pages copy-on-write
+        self.request_processor = AdvancedHttpProcessor()
+        
         # Launch worker processes
         for process_num in range(self.process_count):
+            shutdown_reader, shutdown_writer = mp.Pipe(duplex=False)
+            self.shutdown_pipes.append(shutdown_writer)
+            
+            worker_channel = None
+            if self.server_socket:
+                parent_channel, worker_channel = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+                self.worker_channels.append(parent_channel)
+            
             worker_process = mp.Process(
                 target=worker_process_function,
-                args=(self.request_queue, process_num + 1, self.bind_address, self.bind_port),
+                args=(process_num + 1, self.bind_address, self.bind_port, self.request_processor, shutdown_reader, worker_channel),
                 name=f"HttpWorker-{process_num + 1}"
             )
             worker_process.start()
+            shutdown_reader.close()
+            if worker_channel:
+                worker_channel.close()
             self.worker_pool.append(worker_process)
             logger.info(f"Started worker process {process_num + 1} (PID: {worker_process.pid})")
         
-        # Start statistics tracking thread
-        stats_thread = threading.Thread(target=self.track_server_statistics, daemon=True)
-        stats_thread.start()
+        # Statistics are logged from the supervision loop below
+        self.startup_time = time.monotonic()
+        self.next_stats_at = self.startup_time + STATS_INTERVAL
         
         logger.info(f"Server operational on {self.bind_address}:{self.bind_port}")
         logger.info(f"Process pool configured with {self.process_count} worker processes")
         
-        # Main server acceptance loop
+        # With SO_REUSEPORT the parent only supervises; otherwise it accepts
+        # and passes each connection round-robin to a worker
+        next_worker = 0
         try:
             while self.server_active:
-                try:
-                    # Accept incoming client connection
-                    client_socket, client_address = self.server_socket.accept()
-                    
-                    # Queue connection for worker processes
-                    try:
-                        self.request_queue.put((client_socket, client_address), timeout=2)
-                    except:
-                        logger.warning("Request queue full, dropping connection")
-                        client_socket.close()
-                    
-                except socket.error as socket_err:
-                    if self.server_active:
-                        logger.error(f"Socket error occurred: {socket_err}")
+                if self.server_socket:
+                    next_worker = self.dispatch_connection(next_worker)
+                else:
+                    time.sleep(1)
+                if not any(worker.is_alive() for worker in self.worker_pool):
+                    logger.error("All worker processes have exited")
                     break
+                self.report_statistics()
                     
         except Exception as server_error:
             logger.error(f"Server error occurred: {server_error}")
         finally:
             self.terminate_server()
     
+    def dispatch_connection(self, next_worker):
+        """Accept one connection and send its descriptor to the next live worker
+
+        Workers that have exited are skipped, and a failed send moves on to
+        the following worker. Returns the index to start from next time.
+        """
+        try:
+            client_socket, client_address = self.server_socket.accept()
+        except (socket.timeout, InterruptedError):
+            return next_worker
+        
+        worker_count = len(self.worker_channels)
+        try:
+            for worker_index in [(next_worker + offset) % worker_count for offset in range(worker_count)]:
+                if not self.worker_pool[worker_index].is_alive():
+                    continue
+                try:
+                    socket.send_fds(self.worker_channels[worker_index], [pack_client_address(client_address)], [client_socket.fileno()])
+                    return (worker_index + 1) % worker_count
+                except OSError as dispatch_error:
+                    logger.warning(f"Could not pass connection to worker {worker_index + 1}: {dispatch_error}")
+            logger.warning(f"No worker available for connection from {client_address}")
+            return next_worker
+        finally:
+            # The worker holds its own copy of the descriptor now
+            client_socket.close()
+    
     def signal_shutdown_handler(self, signal_num, frame):
         """Handle shutdown signals gracefully"""
         logger.info(f"Received signal {signal_num}, initiating server shutdown...")
@@ -214,7 +380,7 @@ class ProcessPoolHttpServer:
         logger.info("Terminating process pool server...")
         self.server_active = False
         
-        # Close server socket
+        # Close the parent's listener
         if self.server_socket:
             try:
                 self.server_socket.close()
@@ -222,12 +388,12 @@ class ProcessPoolHttpServer:
             except:
                 pass
         
-        # Send termination signals to all workers
-        for _ in self.worker_pool:
+        # Ask every worker to exit once its current request is done
+        for shutdown_writer in self.shutdown_pipes:
             try:
-                self.request_queue.put((None, None), timeout=2)
-            except:
-                pass
+                shutdown_writer.send_bytes(b'x')
+            except OSError:
+                pass  # Worker already gone
         
         # Wait for worker processes to terminate
         logger.info("Waiting for worker processes to terminate...")
@@ -266,6 +432,8 @@ def main():
         process_count=max_allowed_processes
     )
     
+    # The parent logs directly: a listener thread writing to stderr while
+    # a worker is forked could leave the child holding a locked stream
     try:
         http_server.start_server()
     except Exception as startup_error:
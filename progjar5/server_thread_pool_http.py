@@ -1,10 +1,10 @@
 import socket
+import selectors
 import threading
 import queue
 import time
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from http import AdvancedHttpProcessor
+from http import AdvancedHttpProcessor, send_response, acquire_buf, release_buf, request_content_length, start_log_listener, LISTENER_TYPE_FLAGS
 
 # Setup logging
 logging.basicConfig(
@@ -14,6 +14,35 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Seconds a client may stay silent while sending its request
+CLIENT_READ_TIMEOUT = 25.0
+
+# Seconds between sweeps for clients that stopped sending
+SWEEP_INTERVAL = 1.0
+
+# Seconds between performance log lines
+STATS_INTERVAL = 45
+
+# Connections held at once per worker thread; accepting pauses above this
+CONNECTIONS_PER_THREAD = 8
+
+# Largest request buffered before it is processed as-is
+MAX_REQUEST_SIZE = 15 * 1024 * 1024  # 15MB limit
+
+class ClientConnection:
+    """Read state of a client connection while its request is arriving"""
+    
+    def __init__(self, client_socket, client_endpoint, request_id):
+        self.client_socket = client_socket
+        self.client_endpoint = client_endpoint
+        self.request_id = request_id
+        # Allocated on the first read so idle connections hold no buffer
+        self.request_buffer = None
+        self.received = 0
+        # Total request size, known once the headers have arrived
+        self.expected_size = None
+        self.read_deadline = time.monotonic() + CLIENT_READ_TIMEOUT
+
 class ThreadPoolHttpServer:
     """HTTP Server with Thread Pool for concurrent request handling"""
     
@@ -25,14 +54,27 @@ class ThreadPoolHttpServer:
         self.server_socket = None
         self.server_running = False
         self.http_processor = AdvancedHttpProcessor()
-        self.thread_pool = None
+        # Received requests waiting for one of the fixed worker threads;
+        # its length is bounded by the open connection limit below
+        self.request_queue = queue.SimpleQueue()
+        # Connections being read, queued or answered. Workers decrement the
+        # count and wake the event loop through the wakeup socket pair
+        self.max_open_connections = thread_count * CONNECTIONS_PER_THREAD
+        self.open_connections = 0
+        self.open_connections_lock = threading.Lock()
+        self.accepting = False
+        self.wakeup_reader = None
+        self.wakeup_writer = None
+        self.worker_threads = []
+        self.selector = None
         self.processed_requests = 0
-        self.stats_lock = threading.Lock()
+        self.next_stats_at = 0.0
+        self.next_sweep_at = 0.0
         
     def initialize_server_socket(self):
         """Setup and configure server socket"""
         try:
-            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM | LISTENER_TYPE_FLAGS)
             # Allow socket reuse
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             
@@ -40,8 +82,10 @@ class ThreadPoolHttpServer:
             bind_endpoint = (self.bind_address, self.bind_port)
             self.server_socket.bind(bind_endpoint)
             
-            # Start listening for connections
+            # Start listening for connections; the event loop never blocks on accept
             self.server_socket.listen(self.request_queue_size)
+            if not LISTENER_TYPE_FLAGS:
+                self.server_socket.setblocking(False)
             
             logger.info(f"Server socket initialized on {bind_endpoint}")
             return True
@@ -50,55 +94,206 @@ class ThreadPoolHttpServer:
             logger.error(f"Socket initialization failed: {socket_error}")
             return False
     
-    def process_client_request(self, client_socket, client_endpoint):
-        """Handle individual client request in thread"""
-        request_id = None
-        
-        try:
-            # Generate unique request identifier
-            with self.stats_lock:
-                self.processed_requests += 1
-                request_id = self.processed_requests
-            
-            logger.info(f"Request #{request_id} from {client_endpoint} - Processing started")
-            
-            # Configure socket timeout
-            client_socket.settimeout(25.0)
+    def accept_connections(self):
+        """Accept pending connections, up to the open connection limit, and start reading their requests"""
+        while self.open_connections < self.max_open_connections:
+            try:
+                client_socket, client_endpoint = self.server_socket.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            with self.open_connections_lock:
+                self.open_connections += 1
             
-            # Read request data
-            request_buffer = bytearray()
-            while True:
-                try:
-                    data_chunk = client_socket.recv(8192)
-                    if not data_chunk:
-                        break
-                    
-                    request_buffer.extend(data_chunk)
-                    
-                    # Check for complete HTTP request
-                    if b'\r\n\r\n' in request_buffer:
-                        break
-                        
-                    # Prevent memory exhaustion
-                    if len(request_buffer) > 15 * 1024 * 1024:  # 15MB limit
-                        logger.warning(f"Request #{request_id}: Size limit exceeded")
-                        break
-                        
-                except socket.timeout:
-                    logger.warning(f"Request #{request_id}: Read timeout")
-                    break
+            # Generate unique request identifier; only the event loop counts
+            self.processed_requests += 1
+            request_id = self.processed_requests
             
-            if not request_buffer:
+            logger.debug("Request #%d from %s - Processing started", request_id, client_endpoint)
+            client_socket.setblocking(False)
+            client_connection = ClientConnection(client_socket, client_endpoint, request_id)
+            self.selector.register(client_socket, selectors.EVENT_READ, client_connection)
+    
+    def read_from_connection(self, client_connection):
+        """Read available request bytes; dispatch once the headers are complete"""
+        if client_connection.request_buffer is None:
+            client_connection.request_buffer = acquire_buf()
+        request_buffer = client_connection.request_buffer
+        request_id = client_connection.request_id
+        
+        if client_connection.received == len(request_buffer):
+            # Prevent memory exhaustion
+            if client_connection.received > MAX_REQUEST_SIZE:
+                logger.warning(f"Request #{request_id}: Size limit exceeded")
+                self.dispatch_request(client_connection)
+                return
+            request_buffer.extend(bytes(len(request_buffer)))
+        
+        try:
+            with memoryview(request_buffer) as buffer_view:
+                bytes_read = client_connection.client_socket.recv_into(buffer_view[client_connection.received:])
+        except (BlockingIOError, InterruptedError):
+            return
+        except ConnectionResetError:
+            logger.warning(f"Request #{request_id}: Client connection reset")
+            self.close_connection(client_connection)
+            return
+        except OSError as read_error:
+            logger.error(f"Request #{request_id}: Processing error - {read_error}")
+            self.close_connection(client_connection)
+            return
+        
+        if not bytes_read:
+            if client_connection.received:
+                self.end_incomplete_request(client_connection)
+            else:
                 logger.warning(f"Request #{request_id}: No data received")
+                self.close_connection(client_connection)
+            return
+        client_connection.received += bytes_read
+        # The timeout applies to each silence, not to the whole request
+        client_connection.read_deadline = time.monotonic() + CLIENT_READ_TIMEOUT
+        
+        if client_connection.expected_size is None:
+            # Check for complete headers; only the new bytes (plus 3 for a
+            # terminator split across reads) need scanning
+            scan_start = max(0, client_connection.received - bytes_read - 3)
+            header_end = request_buffer.find(b'\r\n\r\n', scan_start, client_connection.received)
+            if header_end < 0:
                 return
             
-            # Process HTTP request
-            logger.debug(f"Request #{request_id}: Processing {len(request_buffer)} bytes")
-            response_data = self.http_processor.handle_request(bytes(request_buffer))
+            # The request ends after the declared body
+            content_length = request_content_length(request_buffer, header_end)
+            client_connection.expected_size = header_end + 4 + content_length
+            if client_connection.expected_size > MAX_REQUEST_SIZE:
+                logger.warning(f"Request #{request_id}: Size limit exceeded")
+                self.reject_request(client_connection, 413, 'Payload Too Large', 'Request exceeds the size limit')
+                return
+            if client_connection.expected_size > len(request_buffer):
+                # Grow once to the full request size
+                request_buffer.extend(bytes(client_connection.expected_size - len(request_buffer)))
+        
+        if client_connection.received >= client_connection.expected_size:
+            self.dispatch_request(client_connection)
+    
+    def expire_idle_connections(self):
+        """Stop waiting on clients that sent nothing in time, at most once per sweep interval"""
+        current_time = time.monotonic()
+        if current_time < self.next_sweep_at:
+            return
+        self.next_sweep_at = current_time + SWEEP_INTERVAL
+        
+        expired_connections = [
+            selector_key.data for selector_key in self.selector.get_map().values()
+            if isinstance(selector_key.data, ClientConnection) and selector_key.data.read_deadline <= current_time
+        ]
+        for client_connection in expired_connections:
+            logger.warning(f"Request #{client_connection.request_id}: Read timeout")
+            if client_connection.received:
+                self.end_incomplete_request(client_connection)
+            else:
+                self.close_connection(client_connection)
+    
+    def end_incomplete_request(self, client_connection):
+        """Handle a client that stopped sending before its request was complete
+
+        A partial header block is still processed so it gets the usual
+        malformed request answer; a body shorter than its Content-Length is
+        refused rather than saved truncated.
+        """
+        if client_connection.expected_size is None:
+            self.dispatch_request(client_connection)
+        else:
+            logger.warning(f"Request #{client_connection.request_id}: Body shorter than Content-Length")
+            self.reject_request(client_connection, 400, 'Bad Request', 'Incomplete request body')
+    
+    def dispatch_request(self, client_connection):
+        """Hand a received request to the thread pool for processing and sending"""
+        self.selector.unregister(client_connection.client_socket)
+        self.request_queue.put(client_connection)
+    
+    def reject_request(self, client_connection, status_code, status_text, message):
+        """Answer a request that will not be processed, then drop the connection"""
+        client_socket = client_connection.client_socket
+        self.selector.unregister(client_socket)
+        release_buf(client_connection.request_buffer)
+        try:
+            client_socket.settimeout(CLIENT_READ_TIMEOUT)
+            http_response = self.http_processor.build_response(status_code, status_text, message)
+            send_response(client_socket, http_response)
+        except OSError:
+            pass
+        finally:
+            client_socket.close()
+            self.connection_finished()
+    
+    def close_connection(self, client_connection):
+        """Drop a connection that is still registered with the event loop"""
+        self.selector.unregister(client_connection.client_socket)
+        if client_connection.request_buffer is not None:
+            release_buf(client_connection.request_buffer)
+        try:
+            client_connection.client_socket.close()
+        except:
+            pass
+        self.connection_finished()
+    
+    def connection_finished(self):
+        """Count a connection as closed, waking the event loop if accepting was paused"""
+        with self.open_connections_lock:
+            self.open_connections -= 1
+            wake_event_loop = not self.accepting
+        if wake_event_loop:
+            try:
+                self.wakeup_writer.send(b'x')
+            except OSError:
+                # Already pending, or the server is shutting down
+                pass
+    
+    def update_accepting(self):
+        """Stop watching the listener at the open connection limit and resume below it
+
+        While paused, new clients wait in the kernel's listen backlog.
+        """
+        with self.open_connections_lock:
+            below_limit = self.open_connections < self.max_open_connections
+            if below_limit == self.accepting:
+                return
+            self.accepting = below_limit
+        if below_limit:
+            self.selector.register(self.server_socket, selectors.EVENT_READ, None)
+        else:
+            logger.debug("Open connection limit reached, pausing accept")
+            self.selector.unregister(self.server_socket)
+    
+    def drain_wakeups(self):
+        """Discard the bytes workers sent to wake the event loop"""
+        try:
+            while self.wakeup_reader.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+    
+    def respond_to_client(self, client_connection):
+        """Process a buffered request and send the response, in a pool thread"""
+        client_socket = client_connection.client_socket
+        request_id = client_connection.request_id
+        
+        try:
+            # The response is written with blocking sends bounded by a timeout
+            client_socket.settimeout(CLIENT_READ_TIMEOUT)
+            zerocopy_enabled = self.http_processor.prepare_connection(client_socket)
+            
+            # Process HTTP request straight from the pooled buffer
+            logger.debug("Request #%d: Processing %d bytes", request_id, client_connection.received)
+            try:
+                response_data = self.http_processor.handle_request(
+                    client_connection.request_buffer, client_connection.received)
+            finally:
+                release_buf(client_connection.request_buffer)
             
             # Send response to client
-            client_socket.sendall(response_data)
-            logger.info(f"Request #{request_id}: Response sent ({len(response_data)} bytes)")
+            bytes_sent = send_response(client_socket, response_data, zerocopy_enabled)
+            logger.debug("Request #%d: Response sent (%d bytes)", request_id, bytes_sent)
             
         except socket.timeout:
             logger.warning(f"Request #{request_id}: Socket timeout occurred")
@@ -109,19 +304,17 @@ class ThreadPoolHttpServer:
         finally:
             try:
                 client_socket.close()
-                logger.debug(f"Request #{request_id}: Connection closed")
+                logger.debug("Request #%d: Connection closed", request_id)
             except:
                 pass
+            self.connection_finished()
     
-    def monitor_server_performance(self):
-        """Monitor server performance and log statistics"""
-        while self.server_running:
-            try:
-                time.sleep(45)  # Report every 45 seconds
-                with self.stats_lock:
-                    logger.info(f"Server Performance - Requests processed: {self.processed_requests}")
-            except Exception:
-                break
+    def report_statistics(self):
+        """Log server performance when the reporting interval has elapsed"""
+        current_time = time.monotonic()
+        if current_time >= self.next_stats_at:
+            logger.info(f"Server Performance - Requests processed: {self.processed_requests}")
+            self.next_stats_at = current_time + STATS_INTERVAL
     
     def start_server(self):
         """Start the thread pool HTTP server"""
@@ -133,59 +326,74 @@ class ThreadPoolHttpServer:
         
         self.server_running = True
         
-        # Initialize thread pool
-        self.thread_pool = ThreadPoolExecutor(
-            max_workers=self.thread_count,
-            thread_name_prefix="HttpWorker"
-        )
-        
-        # Start performance monitoring thread
-        monitor_thread = threading.Thread(target=self.monitor_server_performance, daemon=True)
-        monitor_thread.start()
+        # Start the long-lived worker threads
+        for thread_number in range(self.thread_count):
+            worker_thread = threading.Thread(target=self.worker_loop, name=f"HttpWorker_{thread_number}")
+            worker_thread.start()
+            self.worker_threads.append(worker_thread)
         
         logger.info(f"Server listening on {self.bind_address}:{self.bind_port}")
         logger.info(f"Thread pool initialized with {self.thread_count} worker threads")
         
+        # Requests are read by this event loop; only processing runs in the pool
+        self.selector = selectors.DefaultSelector()
+        self.wakeup_reader, self.wakeup_writer = socket.socketpair()
+        self.wakeup_reader.setblocking(False)
+        self.wakeup_writer.setblocking(False)
+        self.selector.register(self.wakeup_reader, selectors.EVENT_READ, self.wakeup_reader)
+        self.update_accepting()
+        self.next_stats_at = time.monotonic() + STATS_INTERVAL
+        
         try:
             while self.server_running:
                 try:
-                    # Accept new client connection
-                    client_socket, client_endpoint = self.server_socket.accept()
+                    for selector_key, event_mask in self.selector.select(timeout=1.0):
+                        if selector_key.data is None:
+                            self.accept_connections()
+                        elif selector_key.data is self.wakeup_reader:
+                            self.drain_wakeups()
+                        else:
+                            self.read_from_connection(selector_key.data)
                     
-                    # Submit request to thread pool
-                    future_task = self.thread_pool.submit(
-                        self.process_client_request,
-                        client_socket,
-                        client_endpoint
-                    )
-                    
-                    # Add completion callback
-                    future_task.add_done_callback(lambda task: self.handle_task_completion(task))
+                    self.update_accepting()
+                    self.expire_idle_connections()
+                    self.report_statistics()
                     
                 except socket.error as socket_err:
                     if self.server_running:
                         logger.error(f"Socket error: {socket_err}")
                     break
-                except Exception as accept_error:
-                    logger.error(f"Accept error: {accept_error}")
+                except Exception as loop_error:
+                    logger.error(f"Event loop error: {loop_error}")
                     
         except KeyboardInterrupt:
             logger.info("Server shutdown requested")
         finally:
             self.shutdown_server()
     
-    def handle_task_completion(self, completed_task):
-        """Handle completed thread pool tasks"""
-        try:
-            completed_task.result()  # Will raise exception if task failed
-        except Exception as task_error:
-            logger.error(f"Task completion error: {task_error}")
+    def worker_loop(self):
+        """Respond to queued requests until a None sentinel arrives"""
+        while True:
+            client_connection = self.request_queue.get()
+            if client_connection is None:
+                break
+            try:
+                self.respond_to_client(client_connection)
+            except Exception as task_error:
+                logger.error(f"Task completion error: {task_error}")
     
     def shutdown_server(self):
         """Gracefully shutdown the server"""
         logger.info("Starting server shutdown...")
         self.server_running = False
         
+        if self.selector:
+            # Drop connections whose requests never finished arriving
+            for selector_key in list(self.selector.get_map().values()):
+                if isinstance(selector_key.data, ClientConnection):
+                    self.close_connection(selector_key.data)
+            self.selector.close()
+        
         if self.server_socket:
             try:
                 self.server_socket.close()
@@ -193,11 +401,19 @@ class ThreadPoolHttpServer:
             except:
                 pass
         
-        if self.thread_pool:
+        if self.worker_threads:
             logger.info("Shutting down thread pool...")
-            self.thread_pool.shutdown(wait=True, timeout=15)
+            # Queued requests are finished before the sentinels are reached
+            for _ in self.worker_threads:
+                self.request_queue.put(None)
+            for worker_thread in self.worker_threads:
+                worker_thread.join(timeout=15)
             logger.info("Thread pool shutdown completed")
         
+        for wakeup_socket in (self.wakeup_reader, self.wakeup_writer):
+            if wakeup_socket:
+                wakeup_socket.close()
+        
         logger.info("Server shutdown completed successfully")
 
 def main():
@@ -220,12 +436,14 @@ def main():
         request_queue_size=args.queue_size
     )
     
+    log_listener = start_log_listener()
     try:
         http_server.start_server()
     except Exception as main_error:
         logger.error(f"Server startup error: {main_error}")
     finally:
         logger.info("Server process terminated")
+        log_listener.stop()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,46 +1,130 @@
 # time_server.py
 import socket
-import threading
+import selectors
+import time
 from datetime import datetime
 
-def handle_client(conn, addr):
-    print(f"[INFO] Koneksi baru dari {addr}")
-    done = False
-    while not done:
+# Detik dan balasan TIME terakhir; balasan hanya dibentuk ulang sekali per detik
+_cached_time = [0, b""]
+
+# Batas panjang satu perintah yang belum diakhiri baris baru
+MAX_COMMAND_LENGTH = 1024
+
+def time_reply():
+    detik = int(time.time())
+    if detik != _cached_time[0]:
+        waktu = datetime.fromtimestamp(detik).strftime("%H:%M:%S")
+        _cached_time[:] = [detik, f"JAM {waktu}\r\n".encode('utf-8')]
+    return _cached_time[1]
+
+class ClientState:
+    # Status satu klien di event loop: data masuk yang belum lengkap dan balasan yang belum terkirim
+    def __init__(self, addr):
+        self.addr = addr
+        self.inbuf = bytearray()
+        self.outbuf = bytearray()
+        self.done = False
+
+def accept_client(sel, server_sock):
+    try:
+        client_conn, client_addr = server_sock.accept()
+    except BlockingIOError:
+        return
+    client_conn.setblocking(False)
+    # Balasan pendek langsung dikirim tanpa menunggu algoritma Nagle
+    client_conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    for opsi_buffer in (socket.SO_SNDBUF, socket.SO_RCVBUF):
+        try:
+            client_conn.setsockopt(socket.SOL_SOCKET, opsi_buffer, 65536)
+        except OSError:
+            pass
+    print(f"[INFO] Koneksi baru dari {client_addr}")
+    sel.register(client_conn, selectors.EVENT_READ, ClientState(client_addr))
+    print(f"[INFO] Klien aktif: {len(sel.get_map()) - 1}")
+
+def close_client(sel, conn, state):
+    sel.unregister(conn)
+    conn.close()
+    print(f"[INFO] Koneksi dengan {state.addr} ditutup.")
+
+def handle_command(state, message):
+    print(f"[INFO] Perintah dari {state.addr}: {message}")
+    if message == "TIME":
+        state.outbuf += time_reply()
+    elif message == "QUIT":
+        print(f"[INFO] {state.addr} mengakhiri koneksi.")
+        state.done = True
+    else:
+        state.outbuf += b"INVALID COMMAND\r\n"
+
+def read_client(sel, conn, state):
+    try:
         data = conn.recv(1024)
-        if not data:
-            print(f"[WARNING] Tidak ada data dari {addr}, koneksi ditutup.")
+    except BlockingIOError:
+        return
+    except OSError:
+        # Kesalahan apa pun pada satu klien hanya menutup klien itu
+        data = b""
+    if not data:
+        print(f"[WARNING] Tidak ada data dari {state.addr}, koneksi ditutup.")
+        close_client(sel, conn, state)
+        return
+
+    # Setiap perintah diakhiri baris baru; sisa yang belum lengkap disimpan
+    state.inbuf += data
+    while not state.done:
+        line_end = state.inbuf.find(b"\n")
+        if line_end < 0:
             break
+        message = state.inbuf[:line_end].decode('utf-8', errors='replace').strip()
+        del state.inbuf[:line_end + 1]
+        handle_command(state, message)
 
-        message = data.decode('utf-8').strip()
-        print(f"[INFO] Perintah dari {addr}: {message}")
+    if len(state.inbuf) > MAX_COMMAND_LENGTH:
+        state.inbuf.clear()
+        state.outbuf += b"INVALID COMMAND\r\n"
 
-        if message == "TIME":
-            waktu = datetime.now().strftime("%H:%M:%S")
-            reply = f"JAM {waktu}\r\n"
-            conn.sendall(reply.encode('utf-8'))
-        elif message == "QUIT":
-            print(f"[INFO] {addr} mengakhiri koneksi.")
-            done = True
-        else:
-            conn.sendall(b"INVALID COMMAND\r\n")
+    write_client(sel, conn, state)
 
-    conn.close()
-    print(f"[INFO] Koneksi dengan {addr} ditutup.")
+def write_client(sel, conn, state):
+    try:
+        while state.outbuf:
+            sent = conn.send(state.outbuf)
+            del state.outbuf[:sent]
+    except BlockingIOError:
+        pass
+    except OSError:
+        close_client(sel, conn, state)
+        return
+
+    if state.outbuf:
+        # Sisa balasan dikirim saat socket siap ditulis lagi
+        sel.modify(conn, selectors.EVENT_READ | selectors.EVENT_WRITE, state)
+    elif state.done:
+        close_client(sel, conn, state)
+    elif sel.get_key(conn).events != selectors.EVENT_READ:
+        sel.modify(conn, selectors.EVENT_READ, state)
 
 def run_server(host="0.0.0.0", port=45000):
+    sel = selectors.DefaultSelector()
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         s.bind((host, port))
         s.listen()
+        s.setblocking(False)
+        sel.register(s, selectors.EVENT_READ, None)
         print(f"[INFO] Time Server berjalan di {host}:{port}")
 
+        # Satu thread melayani semua klien lewat event loop
         while True:
-            client_conn, client_addr = s.accept()
-            thread = threading.Thread(target=handle_client, args=(client_conn, client_addr))
-            thread.daemon = True
-            thread.start()
-            print(f"[INFO] Thread aktif: {threading.active_count()-1}")
+            for key, mask in sel.select():
+                if key.data is None:
+                    accept_client(sel, s)
+                    continue
+                if mask & selectors.EVENT_WRITE:
+                    write_client(sel, key.fileobj, key.data)
+                if mask & selectors.EVENT_READ and key.fileobj.fileno() != -1:
+                    read_client(sel, key.fileobj, key.data)
 
 if __name__ == "__main__":
     run_server()